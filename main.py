@@ -3,14 +3,49 @@ import os
 import datetime
 import shutil
 import random
+import subprocess
+import time
+import re
+import locale
+import wave
+import queue
+import threading
+import multiprocessing
+import mmap
+import array
+import struct
+import signal
 import pygame
 import json
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton, QLabel, QInputDialog, QMessageBox, QHBoxLayout, QSlider, QAbstractItemView, QMenu, QAction, QLineEdit, QHeaderView
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QTimer, QPoint, QSettings
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from operator import attrgetter
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton, QLabel, QInputDialog, QMessageBox, QHBoxLayout, QSlider, QAbstractItemView, QMenu, QAction, QLineEdit, QHeaderView, QFileDialog
+from PyQt5.QtGui import QIcon, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QPoint, QSettings, QStandardPaths, QItemSelectionModel
+
+# mutagen is used to read the duration of audio files, without it only the duration of .wav files can be read.
+try:
+    import mutagen
+except ImportError:
+    mutagen = None
+
+# numpy is optional, it's used to analyze the BPM and key of audio files.
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Initialize pygame mixer for audio playback.
-pygame.mixer.init()
+# Audio analysis worker processes import this file too, but don't play audio.
+if multiprocessing.parent_process() is None:
+    pygame.mixer.init()
+
+# Use the user's locale when comparing file names, so accented letters sort next to their base letter.
+try:
+    locale.setlocale(locale.LC_COLLATE, "")
+except locale.Error:
+    pass
 
 CONFIG_FILENAME = "config.json"
 
@@ -26,10 +61,1128 @@ SUPPORTED_AUDIO_EXTENSIONS = {
     '.mp2',  # .mp2 files (MPEG Layer II Audio)
 }
 
+# Formats audio files can be exported (transcoded) to, mapped to their file extension, ffmpeg encoder and ffmpeg container.
+EXPORT_FORMATS = {
+    "Ogg Vorbis": (".ogg", "libvorbis", "ogg"),
+    "MP3": (".mp3", "libmp3lame", "mp3"),
+    "FLAC": (".flac", "flac", "flac"),
+}
+
+# Export formats that are lossless, and don't use a bitrate.
+LOSSLESS_EXPORT_FORMATS = {"FLAC"}
+
+EXPORT_BITRATES = ["96k", "128k", "160k", "192k", "256k", "320k"]
+DEFAULT_EXPORT_BITRATE = "192k"
+
+# Remembers the encoder and bitrate each exported file was written with, stored in the folder exported to.
+EXPORT_MANIFEST_FILENAME = ".rymusic_export.json"
+
+# MIDI files contain no audio samples, so they can't be transcoded or analyzed.
+UNSAMPLED_AUDIO_EXTENSIONS = {'.mid', '.midi'}
+
+# Uncompressed audio formats that are played straight from memory mapped files.
+PCM_AUDIO_EXTENSIONS = {'.wav', '.aif', '.aiff'}
+
+# Seconds of audio in each buffer queued on the mixer when playing from a memory mapped file.
+# Buffers are refilled by a playback thread every refill interval, so they must be much longer than it.
+PCM_BUFFER_SECONDS = 1.0
+PCM_REFILL_INTERVAL = 0.05
+
+# Mixer channel used to play audio from memory mapped files.
+PCM_MIXER_CHANNEL = 0
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# The number of played audio files remembered for going back while playing a folder recursively.
+RECURSIVE_HISTORY_LENGTH = 100
+
+# The number of recently visited folders that have their listing, selection and scroll position cached.
+NAVIGATION_CACHE_SIZE = 64
+
+# Milliseconds a folder must be shown for before its statistics are computed.
+FOLDER_STATISTICS_REQUEST_DELAY = 500
+
+# Columns in the file browser.
+NAME_COLUMN = 0
+TYPE_COLUMN = 1
+BPM_COLUMN = 2
+KEY_COLUMN = 3
+MODIFIED_COLUMN = 4
+SIZE_COLUMN = 5
+DURATION_COLUMN = 6
+FILE_BROWSER_COLUMNS = ["Name", "Type", "BPM", "Key", "Modified", "Size", "Duration"]
+
+# The file entry attribute each column is sorted by.
+SORT_KEY_ATTRIBUTES = {
+    NAME_COLUMN: "name_key",
+    TYPE_COLUMN: "type_key",
+    BPM_COLUMN: "bpm",
+    KEY_COLUMN: "key_order",
+    MODIFIED_COLUMN: "modified_time",
+    SIZE_COLUMN: "size",
+    DURATION_COLUMN: "duration",
+}
+
+# Sort orders are lists of (column, descending) pairs, with the most important column first.
+DEFAULT_SORT_ORDER = [(NAME_COLUMN, False)]
+
+# The duration of audio files with a duration that can't be read, shown as "?" in the duration column.
+UNKNOWN_DURATION = -1.0
+
+NATURAL_SORT_PATTERN = re.compile(r'(\d+)')
+
+# Audio is decoded to mono at this sample rate for BPM and key analysis.
+ANALYSIS_SAMPLE_RATE = 22050
+ANALYSIS_FRAME_SIZE = 2048
+ANALYSIS_HOP_SIZE = 256
+
+# The number of analysis frames decoded and processed at a time, about 6 seconds of audio.
+ANALYSIS_BLOCK_FRAMES = 512
+
+MIN_BPM = 60
+MAX_BPM = 200
+
+ANALYSIS_CACHE_FILENAME = "analysis_cache.json"
+
+# The number of audio files waiting to be analyzed for each analysis worker, more are submitted as they finish.
+ANALYSIS_JOBS_PER_WORKER = 4
+
+PITCH_CLASS_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# Krumhansl-Kessler key profiles, starting from the tonic.
+MAJOR_KEY_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+MINOR_KEY_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+
+# Keys sort in Camelot wheel order, so harmonically compatible keys sit next to each other.
+KEY_SORT_ORDER = {}
+for tonic, pitch_class_name in enumerate(PITCH_CLASS_NAMES):
+    camelot_number = (tonic * 7 + 7) % 12 + 1
+    KEY_SORT_ORDER[pitch_class_name] = camelot_number * 2 + 1
+    KEY_SORT_ORDER[PITCH_CLASS_NAMES[(tonic + 9) % 12] + "m"] = camelot_number * 2
+
+
+#------------------------------ File Sorting ------------------------------#
+
+
+def natural_sort_key(text):
+    '''Returns a key that sorts text in natural order ("Track 2" before "Track 10"), comparing the text between numbers using the user's locale.'''
+
+    # Splitting on numbers always puts text at even positions and numbers at odd positions,
+    # so keys compare text with text and numbers with numbers.
+    parts = NATURAL_SORT_PATTERN.split(text.casefold())
+    parts[0::2] = map(locale.strxfrm, parts[0::2])
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+class FileEntry:
+    '''A folder or audio file in a folder listing. Sort keys are computed once, when the entry is listed.'''
+    __slots__ = ("name", "file_type", "modified_time", "size", "duration", "bpm", "key", "key_order", "name_key", "type_key", "column_texts")
+
+    def __init__(self, name, file_type, modified_time, size):
+        self.name = name
+        self.file_type = file_type
+        self.modified_time = modified_time
+        self.size = size
+        self.name_key = natural_sort_key(name)
+        self.type_key = file_type.casefold()
+
+        # Folders have no duration, audio file durations are only read when they're needed.
+        # Audio files with a duration that can't be read have the unknown duration, which sorts before all others.
+        self.duration = 0.0 if file_type == "Folder" else None
+
+        # The BPM and key are filled in from the analysis cache, 0 and -1 sort unanalyzed files first.
+        self.bpm = 0.0
+        self.key = ""
+        self.key_order = -1
+
+        # The text shown in each file browser column, formatted when the entry is first shown.
+        self.column_texts = None
+
+
+def list_folder(folder_path):
+    '''Returns the folders and audio files in a folder as file entries in name order, skipping hidden files and folders.'''
+    folders = []
+    audio_files = []
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+
+                # Skip adding hidden folders.
+                if entry.name.startswith('.'):
+                    continue
+
+                try:
+                    # Add folders.
+                    if entry.is_dir():
+                        folders.append(FileEntry(entry.name, "Folder", entry.stat().st_mtime, 0))
+
+                    # Add audio files.
+                    else:
+                        name, ext = os.path.splitext(entry.name)
+                        if ext.lower() in SUPPORTED_AUDIO_EXTENSIONS:
+                            stat = entry.stat()
+                            audio_files.append(FileEntry(name, ext, stat.st_mtime, stat.st_size))
+
+                # Skip broken links.
+                except FileNotFoundError:
+                    continue
+
+    except (PermissionError, FileNotFoundError):
+        pass
+
+    # Natural sort keys are the slowest to compare, so entries are put in name order once,
+    # and every other sort order starts from this one.
+    folders.sort(key=attrgetter("name_key", "type_key"))
+    audio_files.sort(key=attrgetter("name_key", "type_key"))
+    return folders, audio_files
+
+
+def sort_file_entries(entries, sort_order):
+    '''Returns file entries sorted by each column in the sort order. The entries must be in name order.'''
+
+    # Columns after the name column can only order audio files with the same name, which are left in type order.
+    name_descending = False
+    sort_columns = []
+    for column, descending in sort_order:
+        if column == NAME_COLUMN:
+            name_descending = descending
+            break
+        sort_columns.append((column, descending))
+
+    sorted_entries = entries[::-1] if name_descending else list(entries)
+
+    # Python's sort is stable, so sorting from the least to the most important column gives a multi-column sort,
+    # with ties left in name order. Each pass compares a single precomputed value.
+    for column, descending in reversed(sort_columns):
+        sorted_entries.sort(key=attrgetter(SORT_KEY_ATTRIBUTES[column]), reverse=descending)
+    return sorted_entries
+
+
+def get_audio_duration(audio_path):
+    '''Returns the duration of an audio file in seconds, read from the file's header. Returns None if the duration can't be read.'''
+    try:
+        if mutagen is not None:
+            audio = mutagen.File(audio_path)
+            if audio is not None and audio.info is not None:
+                return float(audio.info.length)
+
+        # Without mutagen, only the duration of .wav files can be read.
+        elif os.path.splitext(audio_path)[1].lower() == '.wav':
+            with wave.open(audio_path, 'rb') as wav_file:
+                return wav_file.getnframes() / wav_file.getframerate()
+
+    except Exception:
+        pass
+    return None
+
+
+def load_audio_durations(folder_path, audio_files, duration_cache, read_missing=True):
+    '''Sets the duration of audio file entries, reusing durations cached by path and modified time.'''
+    for entry in audio_files:
+        if entry.duration is not None:
+            continue
+
+        audio_path = os.path.join(folder_path, entry.name + entry.file_type)
+        cached_duration = duration_cache.get(audio_path)
+        if cached_duration and cached_duration[0] == entry.modified_time:
+            duration = cached_duration[1]
+        elif read_missing:
+            duration = get_audio_duration(audio_path)
+            duration_cache[audio_path] = (entry.modified_time, duration)
+        else:
+            continue
+
+        # Setting the duration means the entry's column text has to be formatted again.
+        entry.duration = UNKNOWN_DURATION if duration is None else duration
+        entry.column_texts = None
+
+
+def load_audio_analysis(folder_path, audio_files, analysis_cache):
+    '''Sets the BPM and key of audio file entries that have been analyzed since they were last modified.'''
+    for entry in audio_files:
+        cached_analysis = analysis_cache.get(os.path.join(folder_path, entry.name + entry.file_type))
+        if cached_analysis and cached_analysis[0] == entry.modified_time:
+            entry.bpm = cached_analysis[1]
+            entry.key = cached_analysis[2]
+            entry.key_order = KEY_SORT_ORDER.get(entry.key, -1)
+            entry.column_texts = None
+
+
+#------------------------------ Folder Traversal ------------------------------#
+
+
+def iter_audio_files_recursive(folder_path, sort_order=DEFAULT_SORT_ORDER, duration_cache=None, analysis_cache=None):
+    '''Lazily yields the paths of audio files in a folder and all of its subfolders, in the order they're shown in the file browser.'''
+
+    # Only this folder is listed up front, subfolders are listed when the traversal reaches them.
+    folders, audio_files = list_folder(folder_path)
+    if any(column == DURATION_COLUMN for column, descending in sort_order):
+        load_audio_durations(folder_path, audio_files, {} if duration_cache is None else duration_cache)
+    if analysis_cache:
+        load_audio_analysis(folder_path, audio_files, analysis_cache)
+    folders = sort_file_entries(folders, sort_order)
+    audio_files = sort_file_entries(audio_files, sort_order)
+
+    # Folders are shown above audio files, so play through them first.
+    for folder in folders:
+        subfolder_path = os.path.join(folder_path, folder.name)
+
+        # Don't follow linked folders, they can link back to a parent folder and loop forever.
+        if os.path.islink(subfolder_path):
+            continue
+        yield from iter_audio_files_recursive(subfolder_path, sort_order, duration_cache, analysis_cache)
+
+    for audio_file in audio_files:
+        yield os.path.join(folder_path, audio_file.name + audio_file.file_type)
+
+
+#------------------------------ Folder Statistics ------------------------------#
+
+
+class FolderTotals:
+    '''Track count, duration, size and the number of tracks of each format in a folder.
+    Tracks with a duration that can't be read are counted separately, instead of adding nothing to the duration.'''
+    __slots__ = ("track_count", "duration", "unknown_duration_count", "size", "formats")
+
+    def __init__(self):
+        self.track_count = 0
+        self.duration = 0.0
+        self.unknown_duration_count = 0
+        self.size = 0
+        self.formats = {}
+
+    def add(self, other, sign=1):
+        '''Adds another folder's totals to these totals, or subtracts them if the sign is -1.'''
+        self.track_count += sign * other.track_count
+        self.duration += sign * other.duration
+        self.unknown_duration_count += sign * other.unknown_duration_count
+        self.size += sign * other.size
+        for file_type, count in other.formats.items():
+            self.formats[file_type] = self.formats.get(file_type, 0) + sign * count
+
+    def copy(self):
+        totals = FolderTotals()
+        totals.add(self)
+        return totals
+
+
+class FolderScan:
+    '''The audio files and subfolders found directly inside of a folder when it was last scanned.'''
+    __slots__ = ("modified_time", "audio_files", "subfolders", "totals")
+
+    def __init__(self, modified_time, audio_files, subfolders, totals):
+        self.modified_time = modified_time
+        self.audio_files = audio_files
+        self.subfolders = subfolders
+        self.totals = totals
+
+
+class FolderStatistics(threading.Thread):
+    '''Computes the totals of folders and all of their subfolders in a background thread.
+
+    Each folder is scanned once, and the totals of the audio files directly inside of it are added to the folder and all of
+    its parent folders. When a folder changes only that folder is scanned again, and only the difference is passed up
+    to its parents. A folder's totals are partial until every folder below it has been scanned.
+
+    Folders are scanned depth first from a stack of jobs. Requesting a folder drops the scans still waiting for the
+    previously requested folder, and puts the requested folder first, so the folder being shown is always scanned next.'''
+
+    def __init__(self, duration_cache):
+        super().__init__(daemon=True)
+        self.duration_cache = duration_cache
+
+        # Everything below is shared with the app, and only used while holding the lock.
+        self.lock = threading.Lock()
+        self.jobs_added = threading.Condition(self.lock)
+        self.jobs = deque()
+        self.request_count = 0
+        self.pending_changed_folders = []
+        self.folder_scans = {}
+        self.totals = {}
+        self.complete_paths = set()
+        self.version = 0
+
+    def request(self, folder_path):
+        '''Starts computing the totals of a folder before any other folder, and checks if the folder has changed since it was scanned.'''
+        folder_path = os.path.abspath(folder_path)
+        try:
+            modified_time = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            return
+
+        with self.lock:
+            if folder_path not in self.complete_paths:
+                self.request_count += 1
+                self.jobs = deque(job for job in self.jobs if job[0] == "folder")
+                self.jobs.appendleft(("scan", folder_path))
+
+            folder_scan = self.folder_scans.get(folder_path)
+            if folder_scan and folder_scan.modified_time != modified_time:
+                self.add_folder_job(folder_path)
+            self.jobs_added.notify()
+
+    def folder_changed(self, folder_path):
+        '''Scans a folder again after files inside of it were added, removed or renamed.'''
+        folder_path = os.path.abspath(folder_path)
+        with self.lock:
+            if folder_path in self.folder_scans:
+                self.add_folder_job(folder_path)
+                self.jobs_added.notify()
+
+    def get_totals(self, folder_path):
+        '''Returns a copy of the totals for a folder, and whether they're partial because the folder is still being scanned.'''
+        folder_path = os.path.abspath(folder_path)
+        with self.lock:
+            totals = self.totals.get(folder_path)
+            totals = totals.copy() if totals else FolderTotals()
+            partial = folder_path not in self.complete_paths
+            for changed_path in self.pending_changed_folders:
+                if changed_path == folder_path or changed_path.startswith(folder_path.rstrip(os.sep) + os.sep):
+                    partial = True
+                    break
+            return totals, partial
+
+    def add_folder_job(self, folder_path):
+        '''Puts a scan of a changed folder before all other jobs. The lock must be held.'''
+        self.pending_changed_folders.append(folder_path)
+        self.jobs.appendleft(("folder", folder_path))
+
+    def run(self):
+        while True:
+            with self.lock:
+                while not self.jobs:
+                    self.jobs_added.wait()
+                job_type, folder_path = self.jobs.popleft()
+                request_count = self.request_count
+
+            try:
+                if job_type == "scan":
+                    self.scan_tree(folder_path, request_count)
+                elif job_type == "complete":
+                    with self.lock:
+                        self.complete_folder(folder_path)
+                else:
+                    new_subfolder_paths = self.scan_folder(folder_path)[1]
+                    with self.lock:
+                        self.add_tree_jobs(folder_path, new_subfolder_paths)
+            except Exception as e:
+                print(f"Error computing folder statistics for {folder_path}: {e}")
+            finally:
+                with self.lock:
+                    if job_type == "folder":
+                        self.pending_changed_folders.remove(folder_path)
+                    self.version += 1
+
+    def scan_tree(self, folder_path, request_count):
+        '''Scans a folder if it hasn't been scanned yet, then puts scans of its subfolders and its completion before all other jobs.'''
+        with self.lock:
+            if folder_path in self.complete_paths:
+                return
+            folder_scan = self.folder_scans.get(folder_path)
+
+        if folder_scan:
+            subfolder_paths = [os.path.join(folder_path, subfolder) for subfolder in sorted(folder_scan.subfolders)]
+        else:
+            subfolder_paths = self.scan_folder(folder_path)[0]
+
+        # Another folder was requested during the scan, so leave the rest of this folder tree until it's requested again.
+        with self.lock:
+            if request_count == self.request_count:
+                self.add_tree_jobs(folder_path, subfolder_paths)
+
+    def add_tree_jobs(self, folder_path, subfolder_paths):
+        '''Puts scans of subfolders, followed by completing their parent folder, before all other jobs. The lock must be held.'''
+        if not subfolder_paths:
+            self.complete_folder(folder_path)
+            return
+
+        # The parent and its parents aren't complete until the subfolders are scanned.
+        path = folder_path
+        while path in self.complete_paths:
+            self.complete_paths.discard(path)
+            path = os.path.dirname(path)
+
+        self.jobs.appendleft(("complete", folder_path))
+        for subfolder_path in reversed(subfolder_paths):
+            if subfolder_path not in self.complete_paths:
+                self.jobs.appendleft(("scan", subfolder_path))
+
+    def complete_folder(self, folder_path):
+        '''Marks a folder complete if all of its subfolders are complete, then does the same for its parent folders.
+        Subfolders are scanned first, so folders are completed bottom-up. Subfolders that were dropped for another request
+        are still incomplete, which leaves the folder incomplete too. The lock must be held.'''
+
+        # Folders removed before they were scanned are complete, they're forgotten when their parent is scanned again.
+        if folder_path not in self.folder_scans:
+            self.complete_paths.add(folder_path)
+            return
+
+        while folder_path not in self.complete_paths:
+            folder_scan = self.folder_scans.get(folder_path)
+            if folder_scan is None:
+                return
+            for subfolder in folder_scan.subfolders:
+                if os.path.join(folder_path, subfolder) not in self.complete_paths:
+                    return
+            self.complete_paths.add(folder_path)
+
+            parent_path = os.path.dirname(folder_path)
+            if parent_path == folder_path:
+                return
+            folder_path = parent_path
+
+    def scan_folder(self, folder_path):
+        '''Scans the audio files directly inside of a folder, and passes the change in its totals up to its parent folders.
+        Returns the paths of all subfolders, and of subfolders that weren't found the last time the folder was scanned.'''
+        with self.lock:
+            previous_scan = self.folder_scans.get(folder_path)
+        previous_audio_files = previous_scan.audio_files if previous_scan else {}
+
+        # Skip folders that were removed before they were scanned.
+        try:
+            modified_time = os.stat(folder_path).st_mtime_ns
+        except FileNotFoundError:
+            return [], []
+
+        # List the folder, reusing the durations of audio files that haven't changed.
+        audio_files = {}
+        subfolders = set()
+        try:
+            with os.scandir(folder_path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        # Don't follow linked folders, they can link back to a parent folder and loop forever.
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subfolders.add(entry.name)
+                            continue
+
+                        file_type = os.path.splitext(entry.name)[1].lower()
+                        if file_type not in SUPPORTED_AUDIO_EXTENSIONS:
+                            continue
+
+                        stat = entry.stat()
+                        previous_audio_file = previous_audio_files.get(entry.name)
+                        if previous_audio_file and previous_audio_file[:2] == (stat.st_mtime, stat.st_size):
+                            audio_files[entry.name] = previous_audio_file
+                            continue
+
+                        audio_path = os.path.join(folder_path, entry.name)
+                        cached_duration = self.duration_cache.get(audio_path)
+                        if cached_duration and cached_duration[0] == stat.st_mtime:
+                            duration = cached_duration[1]
+                        else:
+                            duration = get_audio_duration(audio_path)
+                            self.duration_cache[audio_path] = (stat.st_mtime, duration)
+                        audio_files[entry.name] = (stat.st_mtime, stat.st_size, duration, file_type)
+
+                    # Skip broken links.
+                    except FileNotFoundError:
+                        continue
+
+        # Folders that can't be read, or were removed while being read, count as empty.
+        except (PermissionError, FileNotFoundError):
+            pass
+
+        totals = FolderTotals()
+        for file_modified_time, size, duration, file_type in audio_files.values():
+            totals.track_count += 1
+            if duration is None:
+                totals.unknown_duration_count += 1
+            else:
+                totals.duration += duration
+            totals.size += size
+            totals.formats[file_type] = totals.formats.get(file_type, 0) + 1
+
+        with self.lock:
+
+            # Pass the change in this folder's own totals up to its parents.
+            difference = totals.copy()
+            previous_subfolders = set()
+            if previous_scan:
+                difference.add(previous_scan.totals, -1)
+                previous_subfolders = previous_scan.subfolders
+
+            # Remove the totals of subfolders that were removed or renamed.
+            for subfolder in previous_subfolders - subfolders:
+                subfolder_path = os.path.join(folder_path, subfolder)
+                subfolder_totals = self.totals.get(subfolder_path)
+                if subfolder_totals:
+                    difference.add(subfolder_totals, -1)
+                self.forget_folder_tree(subfolder_path)
+
+            self.folder_scans[folder_path] = FolderScan(modified_time, audio_files, subfolders, totals)
+            self.add_to_parent_totals(folder_path, difference)
+            self.version += 1
+
+        subfolder_paths = [os.path.join(folder_path, subfolder) for subfolder in sorted(subfolders)]
+        new_subfolder_paths = [os.path.join(folder_path, subfolder) for subfolder in sorted(subfolders - previous_subfolders)]
+        return subfolder_paths, new_subfolder_paths
+
+    def add_to_parent_totals(self, folder_path, difference):
+        '''Adds a difference in totals to a folder and all of its parent folders. The lock must be held.'''
+        while True:
+            self.totals.setdefault(folder_path, FolderTotals()).add(difference)
+            parent_path = os.path.dirname(folder_path)
+            if parent_path == folder_path:
+                break
+            folder_path = parent_path
+
+    def forget_folder_tree(self, folder_path):
+        '''Removes everything stored for a folder and its subfolders. The lock must be held.'''
+        subfolder_prefix = folder_path + os.sep
+        for stored_paths in (self.folder_scans, self.totals):
+            for path in [path for path in stored_paths if path == folder_path or path.startswith(subfolder_prefix)]:
+                del stored_paths[path]
+        self.complete_paths = {path for path in self.complete_paths if path != folder_path and not path.startswith(subfolder_prefix)}
+
+
+#------------------------------ Audio Export ------------------------------#
+
+
+class TranscodeProcesses:
+    '''The ffmpeg processes running for an export, so they can be killed when the app is closed instead of being waited on.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.stopped = False
+
+    def start(self, command):
+        '''Starts an ffmpeg process, unless the export has been stopped.'''
+        with self.lock:
+            if self.stopped:
+                raise RuntimeError("The export was stopped.")
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            self.processes.add(process)
+            return process
+
+    def finish(self, process):
+        with self.lock:
+            self.processes.discard(process)
+
+    def stop(self):
+        '''Kills the running ffmpeg processes, and stops any more from starting.'''
+        with self.lock:
+            self.stopped = True
+            for process in self.processes:
+                process.kill()
+
+
+def is_same_file(path, other_path):
+    '''Returns True if two paths point to the same file, including through links.'''
+    if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(other_path)):
+        return True
+    try:
+        return os.path.samefile(path, other_path)
+    except OSError:
+        return False
+
+
+def transcode_audio_file(source_path, output_path, codec, container, bitrate, previous_settings, transcode_processes):
+    '''Transcodes an audio file using ffmpeg. Returns the number of source bytes transcoded, or None if the output was already up to date.
+    previous_settings is the [encoder, bitrate] the existing output was written with, or None if it's unknown.
+    The ffmpeg process is started through transcode_processes, so it can be killed if the app is closed.'''
+
+    # Skip outputs written with the same settings after the source file was last modified.
+    if previous_settings == [codec, bitrate] and os.path.exists(output_path):
+        if os.path.getmtime(output_path) >= os.path.getmtime(source_path):
+            return None
+
+    # ffmpeg streams the file through the decoder and encoder in small frames, so whole files are never loaded into memory.
+    # Write to a temporary file first so an interrupted export is never mistaken for an up to date output.
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temp_path = output_path + ".part"
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", source_path, "-map", "0:a:0", "-map_metadata", "0", "-c:a", codec]
+    if bitrate:
+        command += ["-b:a", bitrate]
+    command += ["-f", container, temp_path]
+
+    process = transcode_processes.start(command)
+    try:
+        errors = process.communicate()[1]
+    finally:
+        transcode_processes.finish(process)
+    if process.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise RuntimeError(errors.decode(errors="replace").strip())
+
+    os.replace(temp_path, output_path)
+    return os.path.getsize(source_path)
+
+
+#------------------------------ Audio Playback ------------------------------#
+
+
+def read_pcm_format(mapped_file):
+    '''Reads the format of an uncompressed WAV or AIFF file from its header chunks.
+    Returns (sample rate, channels, big endian, data offset, data size), or None if the file isn't 16 bit PCM audio.'''
+
+    # Check if this is a WAV or AIFF file.
+    file_type = mapped_file[8:12]
+    if mapped_file[:4] == b'RIFF' and file_type == b'WAVE':
+        byte_order = '<'
+    elif mapped_file[:4] == b'FORM' and file_type in (b'AIFF', b'AIFC'):
+        byte_order = '>'
+    else:
+        return None
+
+    big_endian = byte_order == '>'
+    sample_rate = None
+    channels = None
+    sample_width = None
+    data_offset = None
+    data_size = None
+
+    # Read through the chunks of the file, only the pages holding chunk headers are read from disk.
+    offset = 12
+    while offset + 8 <= len(mapped_file):
+        chunk_id = mapped_file[offset:offset + 4]
+        chunk_size = struct.unpack(byte_order + 'I', mapped_file[offset + 4:offset + 8])[0]
+        chunk_start = offset + 8
+
+        # Chunks that were cut off, or are too short for their fields, can't be read.
+        chunk_length = min(chunk_size, len(mapped_file) - chunk_start)
+
+        # WAV format chunk.
+        if chunk_id == b'fmt ':
+            if chunk_length < 16:
+                return None
+            audio_format, channels, sample_rate = struct.unpack('<HHI', mapped_file[chunk_start:chunk_start + 8])
+            sample_width = struct.unpack('<H', mapped_file[chunk_start + 14:chunk_start + 16])[0]
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_length >= 40:
+                audio_format = struct.unpack('<H', mapped_file[chunk_start + 24:chunk_start + 26])[0]
+            if audio_format != WAVE_FORMAT_PCM:
+                return None
+
+        # AIFF format chunk, the sample rate is stored as an 80 bit float.
+        elif chunk_id == b'COMM':
+            if chunk_length < 18:
+                return None
+            channels, frame_count, sample_width = struct.unpack('>hIh', mapped_file[chunk_start:chunk_start + 8])
+            exponent, mantissa = struct.unpack('>HQ', mapped_file[chunk_start + 8:chunk_start + 18])
+            sample_rate = mantissa * 2.0 ** ((exponent & 0x7FFF) - 16383 - 63)
+
+            # AIFC files are only uncompressed when they use no compression, or little endian samples.
+            if file_type == b'AIFC':
+                if chunk_length < 22:
+                    return None
+                compression_type = mapped_file[chunk_start + 18:chunk_start + 22]
+                if compression_type == b'sowt':
+                    big_endian = False
+                elif compression_type != b'NONE':
+                    return None
+
+        # WAV sample data.
+        elif chunk_id == b'data':
+            data_offset = chunk_start
+            data_size = chunk_size
+
+        # AIFF sample data, which starts after an offset.
+        elif chunk_id == b'SSND':
+            if chunk_length < 8:
+                return None
+            sample_offset = struct.unpack('>I', mapped_file[chunk_start:chunk_start + 4])[0]
+            data_offset = chunk_start + 8 + sample_offset
+            data_size = chunk_size - 8 - sample_offset
+
+        # Chunks are padded to an even size.
+        offset = chunk_start + chunk_size + (chunk_size & 1)
+
+    if None in (sample_rate, channels, data_offset) or sample_width != 16 or channels < 1:
+        return None
+
+    # Files that were cut off can have less data than their header says.
+    data_size = min(data_size, len(mapped_file) - data_offset)
+    return int(round(sample_rate)), channels, big_endian, data_offset, data_size
+
+
+def set_mixer_format(mixer_format):
+    '''Initializes the mixer with a (frequency, size, channels) format, unless it's already using it.
+    Raises pygame.error if the mixer can't be initialized with exactly that format.'''
+    if pygame.mixer.get_init() == mixer_format:
+        return
+
+    # Without allowed changes, SDL converts to the audio device's format instead of picking a different mixer format.
+    pygame.mixer.quit()
+    frequency, size, channels = mixer_format
+    pygame.mixer.init(frequency=frequency, size=size, channels=channels, allowedchanges=0)
+    if pygame.mixer.get_init() != mixer_format:
+        raise pygame.error(f"Unable to initialize the mixer with the format {mixer_format}.")
+
+
+class MixerMusicPlayback:
+    '''Plays an audio file with pygame's music streaming, which supports every format the app can play.
+    The mixer is set back to its default format first, in case it was changed to play a memory mapped file.'''
+
+    def __init__(self, audio_path, mixer_format):
+        self.audio_path = audio_path
+        if mixer_format is not None:
+            set_mixer_format(mixer_format)
+        pygame.mixer.music.load(audio_path)
+
+    def play(self, start=0):
+        pygame.mixer.music.play(start=start)
+
+    def pause(self):
+        pygame.mixer.music.pause()
+
+    def unpause(self):
+        pygame.mixer.music.unpause()
+
+    def get_busy(self):
+        return pygame.mixer.music.get_busy()
+
+    def get_pos(self):
+        '''Returns the milliseconds played since playback was last started.'''
+        return pygame.mixer.music.get_pos()
+
+    def get_length(self):
+        '''Returns the length of the audio in seconds.'''
+
+        # Read the length from the file's header, only decoding the whole file when the header can't be read.
+        audio_length = get_audio_duration(self.audio_path)
+        if audio_length:
+            return audio_length
+        try:
+            return pygame.mixer.Sound(self.audio_path).get_length()
+        except pygame.error:
+            return 0
+
+    def update(self):
+        pass
+
+    def close(self):
+        pygame.mixer.music.stop()
+
+
+class MappedPCMPlayback:
+    '''Plays an uncompressed WAV or AIFF file by memory mapping it, and queueing buffers sliced straight from the mapped file on a mixer channel.
+    Buffers are queued by a playback thread, so playback doesn't stop when the interface is busy.
+    Pages that were already played are released where the system supports it, so long files don't stay resident.'''
+
+    def __init__(self, audio_path):
+        # The lock is held by the playback thread while it queues buffers.
+        self.lock = threading.Lock()
+        self.playback_thread = None
+        self.stopped = False
+        self.channel = None
+
+        self.file = open(audio_path, 'rb')
+        self.mapped_file = None
+        self.data = None
+        try:
+            self.mapped_file = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            pcm_format = read_pcm_format(self.mapped_file)
+            if pcm_format is None:
+                raise ValueError(f"Not a 16 bit PCM audio file: {audio_path}")
+        except Exception:
+            self.close()
+            raise
+
+        self.sample_rate, self.channels, big_endian, data_offset, data_size = pcm_format
+        self.frame_size = self.channels * 2
+        data_size -= data_size % self.frame_size
+
+        # Slicing a memoryview doesn't copy, buffers are read from the mapped pages when the mixer copies them in.
+        self.data = memoryview(self.mapped_file)[data_offset:data_offset + data_size]
+        self.data_offset = data_offset
+        self.released_offset = 0
+        self.swap_bytes = big_endian != (sys.byteorder == 'big')
+        self.buffer_size = int(self.sample_rate * PCM_BUFFER_SECONDS) * self.frame_size
+
+        self.position = 0
+        self.play_time = 0
+        self.pause_time = None
+
+    def play(self, start=0):
+        '''Starts playing from a position in seconds. Raises pygame.error if the mixer can't play the file's format.'''
+        with self.lock:
+            self.stop_channel()
+
+            # The mixer must match the file's format for its samples to be played as they are.
+            set_mixer_format((self.sample_rate, -16, self.channels))
+
+            # Start from the frame at the start position.
+            frame_count = len(self.data) // self.frame_size
+            self.position = min(int(start * self.sample_rate), frame_count) * self.frame_size
+            self.released_offset = (self.data_offset + self.position) // mmap.PAGESIZE * mmap.PAGESIZE
+            self.play_time = time.monotonic()
+            self.pause_time = None
+
+            sound = self.read_buffer()
+            if sound is None:
+                return
+            self.channel = pygame.mixer.Channel(PCM_MIXER_CHANNEL)
+            self.channel.play(sound)
+            self.queue_buffer()
+
+        if self.playback_thread is None:
+            self.playback_thread = threading.Thread(target=self.run_playback_thread, daemon=True)
+            self.playback_thread.start()
+
+    def run_playback_thread(self):
+        '''Refills the mixer channel until playback is closed.'''
+        while not self.stopped:
+            self.fill_channel()
+            time.sleep(PCM_REFILL_INTERVAL)
+
+    def fill_channel(self):
+        '''Queues the next buffer once the mixer channel has started playing the last queued buffer.
+        If the channel ran out of buffers before it was refilled, it's restarted with the next buffer.'''
+        with self.lock:
+            if self.stopped or self.channel is None or self.pause_time is not None:
+                return
+            if not self.channel.get_busy():
+                sound = self.read_buffer()
+                if sound is None:
+                    return
+                self.channel.play(sound)
+            if self.channel.get_queue() is None:
+                self.queue_buffer()
+
+    def read_buffer(self):
+        '''Returns a sound for the next buffer of audio, or None if the end of the audio was reached.'''
+        if self.position >= len(self.data):
+            return None
+
+        with self.data[self.position:self.position + self.buffer_size] as buffer:
+            self.position += len(buffer)
+
+            # Big endian samples are swapped into a buffer sized copy, little endian samples are passed to the mixer as they are.
+            if self.swap_bytes:
+                samples = array.array('h')
+                samples.frombytes(buffer)
+                samples.byteswap()
+                sound = pygame.mixer.Sound(buffer=samples)
+            else:
+                sound = pygame.mixer.Sound(buffer=buffer)
+
+        self.release_played_pages()
+        return sound
+
+    def release_played_pages(self):
+        '''Lets the system drop mapped pages that were already copied into sounds, so resident memory stays around
+        the size of the buffers instead of growing to the size of the file. Only systems with madvise support this.'''
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        released_offset = (self.data_offset + self.position) // mmap.PAGESIZE * mmap.PAGESIZE
+        if released_offset > self.released_offset:
+            self.mapped_file.madvise(mmap.MADV_DONTNEED, self.released_offset, released_offset - self.released_offset)
+            self.released_offset = released_offset
+
+    def queue_buffer(self):
+        '''Queues the next buffer of audio to play once the current buffer finishes.'''
+        sound = self.read_buffer()
+        if sound is not None and self.channel is not None:
+            self.channel.queue(sound)
+
+    def pause(self):
+        with self.lock:
+            if self.channel and self.pause_time is None:
+                self.channel.pause()
+                self.pause_time = time.monotonic()
+
+    def unpause(self):
+        with self.lock:
+            if self.channel and self.pause_time is not None:
+                self.channel.unpause()
+                self.play_time += time.monotonic() - self.pause_time
+                self.pause_time = None
+
+    def get_busy(self):
+        '''Returns True until all of the mapped audio has been played, even if the mixer channel is waiting to be refilled.'''
+        if self.stopped or self.channel is None:
+            return False
+        return self.position < len(self.data) or self.channel.get_busy()
+
+    def get_pos(self):
+        '''Returns the milliseconds played since playback was last started.'''
+        current_time = self.pause_time if self.pause_time is not None else time.monotonic()
+        return int((current_time - self.play_time) * 1000)
+
+    def get_length(self):
+        '''Returns the length of the audio in seconds.'''
+        return len(self.data) / self.frame_size / self.sample_rate
+
+    def update(self):
+        self.fill_channel()
+
+    def stop_channel(self):
+        if self.channel is not None:
+            self.channel.stop()
+            self.channel = None
+
+    def close(self):
+        '''Stops playback and unmaps the file.'''
+        self.stopped = True
+        if self.playback_thread is not None:
+            self.playback_thread.join()
+        self.stop_channel()
+        if self.data is not None:
+            self.data.release()
+        if self.mapped_file is not None:
+            self.mapped_file.close()
+        self.file.close()
+
+
+#------------------------------ Audio Analysis ------------------------------#
+
+
+def register_analysis_worker(worker_ids):
+    '''Sends the process ID of a starting analysis worker process to the app, so the app can terminate it when closed.'''
+    worker_ids.put(os.getpid())
+
+
+def analyze_audio_file(audio_path):
+    '''Estimates the BPM and musical key of an audio file. Runs in an analysis worker process.'''
+
+    # Stream the audio from ffmpeg as mono 16 bit samples, so only one block of audio is in memory at a time.
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-i", audio_path, "-map", "0:a:0", "-f", "s16le", "-ac", "1", "-ar", str(ANALYSIS_SAMPLE_RATE), "-"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    window = np.hanning(ANALYSIS_FRAME_SIZE).astype(np.float32)
+    block_size = ANALYSIS_BLOCK_FRAMES * ANALYSIS_HOP_SIZE
+    onset_blocks = []
+    spectrum_energy = np.zeros(ANALYSIS_FRAME_SIZE // 2 + 1)
+    previous_spectrum = None
+    samples = np.zeros(0, dtype=np.float32)
+    decoded = False
+    try:
+        while True:
+            data = process.stdout.read(block_size * 2)
+            if not data:
+                break
+            decoded = True
+
+            # Keep the samples that didn't fill a whole frame for the next block.
+            block = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768
+            samples = np.concatenate((samples, block))
+            frame_count = (len(samples) - ANALYSIS_FRAME_SIZE) // ANALYSIS_HOP_SIZE + 1
+            if frame_count <= 0:
+                continue
+
+            # View the block as overlapping frames without copying it, and take the spectrum of every frame at once.
+            frames = np.lib.stride_tricks.as_strided(samples, shape=(frame_count, ANALYSIS_FRAME_SIZE), strides=(samples.strides[0] * ANALYSIS_HOP_SIZE, samples.strides[0]))
+            spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+            spectrum_energy += (spectrum ** 2).sum(axis=0)
+
+            # The onset envelope is the increase in log spectrum energy (spectral flux) from frame to frame.
+            log_spectrum = np.log1p(100 * spectrum)
+            if previous_spectrum is None:
+                previous_spectrum = log_spectrum[:1]
+            spectral_flux = np.maximum(np.diff(np.vstack((previous_spectrum, log_spectrum)), axis=0), 0).sum(axis=1)
+            onset_blocks.append(spectral_flux)
+            previous_spectrum = log_spectrum[-1:]
+            samples = samples[frame_count * ANALYSIS_HOP_SIZE:]
+
+    finally:
+        process.stdout.close()
+        process.wait()
+
+    if not decoded:
+        raise RuntimeError(f"Unable to decode audio: {audio_path}")
+
+    # Audio shorter than a single frame has no BPM or key.
+    if not onset_blocks:
+        return 0.0, ""
+
+    return estimate_bpm(np.concatenate(onset_blocks)), estimate_key(spectrum_energy)
+
+
+def estimate_bpm(onset_envelope):
+    '''Estimates the tempo in beats per minute from the autocorrelation of an onset envelope.'''
+    frames_per_second = ANALYSIS_SAMPLE_RATE / ANALYSIS_HOP_SIZE
+
+    # Remove slow changes in loudness, leaving the onsets.
+    # Clips shorter than the smoothing window are too short to have a tempo.
+    smoothing_size = int(frames_per_second)
+    if len(onset_envelope) < smoothing_size:
+        return 0.0
+    onset_envelope = onset_envelope - np.convolve(onset_envelope, np.ones(smoothing_size) / smoothing_size, mode="same")
+
+    # Autocorrelate the onset envelope through the FFT, padding it so the correlation doesn't wrap around.
+    frame_count = len(onset_envelope)
+    spectrum = np.fft.rfft(onset_envelope, 2 * frame_count)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum))[:frame_count]
+
+    lags = np.arange(int(frames_per_second * 60 / MAX_BPM), min(int(frames_per_second * 60 / MIN_BPM) + 1, frame_count - 1))
+    if len(lags) < 3:
+        return 0.0
+
+    # Favour tempos near 120 BPM, so half and double tempos are picked less often.
+    bpms = 60 * frames_per_second / lags
+    scores = autocorrelation[lags] * np.exp(-0.5 * np.log2(bpms / 120) ** 2)
+    best_index = int(np.argmax(scores))
+
+    # Refine the lag between frames by fitting a parabola through the best score and its neighbours.
+    lag = float(lags[best_index])
+    if 0 < best_index < len(lags) - 1:
+        previous_score, best_score, next_score = scores[best_index - 1:best_index + 2]
+        curvature = previous_score - 2 * best_score + next_score
+        if curvature < 0:
+            lag += 0.5 * (previous_score - next_score) / curvature
+
+    return round(float(60 * frames_per_second / lag), 1)
+
+
+def estimate_key(spectrum_energy):
+    '''Estimates the musical key by correlating the energy in each pitch class with major and minor key profiles.'''
+
+    # Fold the energy of the spectrum into the 12 pitch classes, ignoring frequencies outside of the musical range.
+    frequencies = np.fft.rfftfreq(ANALYSIS_FRAME_SIZE, 1 / ANALYSIS_SAMPLE_RATE)
+    musical_range = (frequencies >= 55) & (frequencies <= 2000)
+    midi_notes = np.round(69 + 12 * np.log2(frequencies[musical_range] / 440)).astype(int)
+    chroma = np.bincount(midi_notes % 12, weights=np.sqrt(spectrum_energy[musical_range]), minlength=12)
+
+    # Correlate the chroma with every major and minor key at once.
+    profiles = np.array([np.roll(MAJOR_KEY_PROFILE, tonic) for tonic in range(12)] + [np.roll(MINOR_KEY_PROFILE, tonic) for tonic in range(12)])
+    profiles = (profiles - profiles.mean(axis=1, keepdims=True)) / profiles.std(axis=1, keepdims=True)
+    chroma = (chroma - chroma.mean()) / (chroma.std() or 1)
+    best_key = int(np.argmax(profiles @ chroma))
+
+    if best_key < 12:
+        return PITCH_CLASS_NAMES[best_key]
+    return PITCH_CLASS_NAMES[best_key - 12] + "m"
+
+
 class AudioPlayer(QWidget):
     def __init__(self):
         super().__init__()
+
+        # Define folder navigation variables, these are used when loading the first folder.
+        self.displayed_items = {}
+        self.folder_cache = OrderedDict()
+        self.folder_view_states = OrderedDict()
+        self.displayed_path = None
+        self.back_history = []
+        self.forward_history = []
+
+        # Define file sorting variables.
+        self.sort_order = list(DEFAULT_SORT_ORDER)
+        self.duration_cache = {}
+        self.analysis_cache = self.load_analysis_cache()
+
+        # Start computing folder statistics in the background.
+        self.folder_statistics = FolderStatistics(self.duration_cache)
+        self.folder_statistics.start()
+        self.displayed_statistics = None
+
+        # Folder statistics are only requested once a folder has been shown for a moment, so folders passed through
+        # while typing a path or clicking through folders don't start scans of their whole folder tree.
+        self.statistics_request_timer = QTimer(self)
+        self.statistics_request_timer.setSingleShot(True)
+        self.statistics_request_timer.setInterval(FOLDER_STATISTICS_REQUEST_DELAY)
+        self.statistics_request_timer.timeout.connect(self.request_folder_statistics)
+
         self.init_ui()
+        if mutagen is None:
+            self.log("mutagen isn't installed, only the durations of .wav files can be read.", error=True)
         self.load_files()
 
         # Add a timer to update the seek slider.
@@ -37,13 +1190,55 @@ class AudioPlayer(QWidget):
         self.timer.timeout.connect(self.timer_trigger)
         self.timer.start(100)
 
+        # Add a timer to check on the progress of exports.
+        self.export_timer = QTimer(self)
+        self.export_timer.timeout.connect(self.check_export_progress)
+
+        # Add a timer to update the folder statistics as they're computed.
+        self.statistics_timer = QTimer(self)
+        self.statistics_timer.timeout.connect(self.update_folder_statistics_label)
+        self.statistics_timer.start(250)
+
+        # Add a timer to collect audio analysis results.
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.timeout.connect(self.check_analysis_progress)
+
         # Define audio player variables.
+        # The mixer's format is changed to play memory mapped files, so remember the default format for streaming other files.
+        self.default_mixer_format = pygame.mixer.get_init()
+        self.playback = None
         self.paused = True
         self.last_seek_position = 0
         self.clipboard = []
         self.cut_mode = False
         self.active_playlist_index = -1
         self.slider_grabbed = False
+
+        # Define recursive folder playback variables.
+        self.recursive_root_path = None
+        self.recursive_queue = None
+        self.recursive_history = deque(maxlen=RECURSIVE_HISTORY_LENGTH)
+        self.recursive_upcoming = deque(maxlen=RECURSIVE_HISTORY_LENGTH)
+        self.recursive_active_path = None
+
+        # Define audio export variables.
+        self.export_executor = None
+        self.export_processes = None
+        self.export_futures = []
+        self.export_output_paths = []
+        self.export_destination_path = ""
+        self.export_manifest = {}
+        self.export_settings = []
+        self.export_start_time = 0
+
+        # Define audio analysis variables.
+        self.analysis_executor = None
+        self.analysis_worker_ids = None
+        self.analysis_results = queue.Queue()
+        self.analysis_collecting = False
+        self.analysis_total_count = 0
+        self.analysis_finished_count = 0
+        self.analysis_errors = []
     
     def init_ui(self):
         '''Initializes the app UI.'''
@@ -66,6 +1261,23 @@ class AudioPlayer(QWidget):
         '''Initializes the menu bar.'''
         self.menu_layout = QHBoxLayout()
 
+        # Add buttons to go back and forward through visited folders.
+        self.back_button = QPushButton("<", self)
+        self.back_button.setToolTip("Go back to the previous folder.")
+        self.back_button.setShortcut(QKeySequence("Alt+Left"))
+        self.back_button.clicked.connect(self.go_back)
+        self.back_button.setFixedSize(30, 30)
+        self.back_button.setEnabled(False)
+        self.menu_layout.addWidget(self.back_button)
+
+        self.forward_button = QPushButton(">", self)
+        self.forward_button.setToolTip("Go forward to the next folder.")
+        self.forward_button.setShortcut(QKeySequence("Alt+Right"))
+        self.forward_button.clicked.connect(self.go_forward)
+        self.forward_button.setFixedSize(30, 30)
+        self.forward_button.setEnabled(False)
+        self.menu_layout.addWidget(self.forward_button)
+
         # Add a button to go to the parent folder.
         self.parent_folder_button = QPushButton("^", self)
         self.parent_folder_button.setToolTip("Go to the parent folder.")
@@ -112,8 +1324,8 @@ class AudioPlayer(QWidget):
     def init_file_browser(self):
         '''Initializes file browser.'''
         self.file_browser = QTreeWidget()
-        self.file_browser.setColumnCount(2)
-        self.file_browser.setHeaderLabels(["Name", "Type"])
+        self.file_browser.setColumnCount(len(FILE_BROWSER_COLUMNS))
+        self.file_browser.setHeaderLabels(FILE_BROWSER_COLUMNS)
         self.file_browser.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.file_browser.setContextMenuPolicy(Qt.CustomContextMenu)
         self.file_browser.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -123,11 +1335,28 @@ class AudioPlayer(QWidget):
 
         # Set column resize modes.
         header = self.file_browser.header()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        header.setStretchLastSection(False)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(True)
+        self.file_browser.setColumnWidth(TYPE_COLUMN, 70)
+        self.file_browser.setColumnWidth(BPM_COLUMN, 60)
+        self.file_browser.setColumnWidth(KEY_COLUMN, 50)
+        self.file_browser.setColumnWidth(MODIFIED_COLUMN, 130)
+        self.file_browser.setColumnWidth(SIZE_COLUMN, 80)
+
+        # Sort files when a column header is clicked.
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(NAME_COLUMN, Qt.AscendingOrder)
+        header.setToolTip("Click a column to sort by it, shift click to also sort by it.")
+        header.sectionClicked.connect(self.file_browser_header_clicked)
         self.layout.addWidget(self.file_browser)
 
+        # Add a label for the totals of the current folder and its subfolders.
+        self.folder_statistics_label = QLabel("", self)
+        self.folder_statistics_label.setToolTip("Totals for the current folder and all of its subfolders.")
+        self.folder_statistics_label.setStyleSheet("padding-top: 5px;")
+        self.layout.addWidget(self.folder_statistics_label)
+
         # Delay setting column widths until the widget is fully shown
         QTimer.singleShot(0, self.resize_columns)
 
@@ -135,14 +1364,37 @@ class AudioPlayer(QWidget):
         """Adjusts column widths after widget is fully displayed."""
         total_width = self.file_browser.viewport().width()
         if total_width > 0:
-            name_width = int(total_width * 0.8)
-            self.file_browser.setColumnWidth(0, name_width)
+            other_columns_width = sum(self.file_browser.columnWidth(column) for column in range(1, DURATION_COLUMN))
+            name_width = max(total_width - other_columns_width - 70, int(total_width * 0.4))
+            self.file_browser.setColumnWidth(NAME_COLUMN, name_width)
 
     def resizeEvent(self, event):
         """Ensures columns resize dynamically when the widget resizes."""
         super().resizeEvent(event)
         self.resize_columns()
 
+    def closeEvent(self, event):
+        '''Stops running exports and audio analysis when the app is closed, so it doesn't wait for them to finish.
+        Analysis results that finished before the app was closed are still saved.'''
+        if self.export_executor:
+            self.export_executor.shutdown(wait=False, cancel_futures=True)
+            self.export_processes.stop()
+
+        if self.analysis_executor:
+            self.collect_analysis_results()
+            self.save_analysis_cache()
+
+            # Terminate the worker processes instead of waiting for the files they're analyzing,
+            # their ffmpeg processes exit when the pipe they're writing to is closed.
+            # Once one worker is terminated the pool stops the others, so they may have exited already.
+            self.analysis_executor.shutdown(wait=False, cancel_futures=True)
+            while not self.analysis_worker_ids.empty():
+                try:
+                    os.kill(self.analysis_worker_ids.get(), signal.SIGTERM)
+                except OSError:
+                    pass
+        super().closeEvent(event)
+
     def init_audio_controls(self):
         '''Initializes audio controls.'''
 
@@ -225,6 +1477,15 @@ class AudioPlayer(QWidget):
             copy_action = QAction("Copy", self)
             copy_action.triggered.connect(self.copy_files)
             menu.addAction(copy_action)
+
+            export_action = QAction("Export As...", self)
+            export_action.triggered.connect(self.export_files)
+            menu.addAction(export_action)
+
+        analyze_action = QAction("Analyze BPM and Key", self)
+        analyze_action.setToolTip("Analyzes the selected files and folders, or the current folder if nothing is selected.")
+        analyze_action.triggered.connect(self.analyze_files)
+        menu.addAction(analyze_action)
         
         if self.cut_mode:
             paste_action = QAction("Paste", self)
@@ -236,12 +1497,16 @@ class AudioPlayer(QWidget):
             delete_action.triggered.connect(self.delete_files)
             menu.addAction(delete_action)
 
+        play_recursive_action = QAction("Play Folder Recursively", self)
+        play_recursive_action.triggered.connect(self.play_folder_recursively)
+        menu.addAction(play_recursive_action)
+
         new_folder_action = QAction("Create New Folder")
         new_folder_action.triggered.connect(self.create_new_folder)
         menu.addAction(new_folder_action)
 
         refresh_directory_action = QAction("Refresh Directory")
-        refresh_directory_action.triggered.connect(self.load_files)
+        refresh_directory_action.triggered.connect(self.refresh_directory)
         menu.addAction(refresh_directory_action)
 
         sort_az_action = QAction("Sort A - Z", self)
@@ -256,45 +1521,217 @@ class AudioPlayer(QWidget):
     
     def load_files(self):
         '''Loads files and folders into the file browser (QTreeWidget).'''
+
+        # Remember the selection and scroll position of the folder being replaced.
+        if self.displayed_path:
+            self.save_view_state(self.displayed_path)
         self.file_browser.clear()
+        self.displayed_items = {}
+        self.displayed_path = None
 
         # If the path does not exist, don't load any files.
         current_path = self.folder_path_field.text()
         if not os.path.exists(current_path):
+            self.update_folder_statistics_label()
             return
 
-        folders = []
-        audio_files = []
+        folders, audio_files = self.get_folder_listing(current_path)
+
+        folder_icon = QIcon.fromTheme("folder")
+        folder_items = []
+        for folder in folders:
+            folder_item = self.create_file_browser_item(folder)
+            folder_item.setIcon(0, folder_icon)
+            folder_items.append(folder_item)
+        self.file_browser.addTopLevelItems(folder_items)
+
+        audio_file_items = [self.create_file_browser_item(audio_file) for audio_file in audio_files]
+        self.file_browser.addTopLevelItems(audio_file_items)
+
+        # Remember the item showing each entry, so sorting can move items instead of creating new ones.
+        self.displayed_items = {}
+        for entry, item in zip(folders + audio_files, folder_items + audio_file_items):
+            self.displayed_items[(entry.name, entry.file_type)] = item
+
+        self.displayed_path = current_path
+        self.restore_view_state(current_path)
+        self.folder_path_field.setText(current_path)
+
+        self.statistics_request_timer.start()
+        self.update_folder_statistics_label()
+
+    def create_file_browser_item(self, entry):
+        '''Creates a file browser item showing the columns of a file entry.'''
+        return QTreeWidgetItem(list(self.get_column_texts(entry)))
 
+    def get_column_texts(self, entry):
+        '''Returns the text shown in each column for a file entry, formatting it only the first time it's shown.'''
+        if entry.column_texts is not None:
+            return entry.column_texts
+
+        modified_time = datetime.datetime.fromtimestamp(entry.modified_time).strftime("%Y-%m-%d %H:%M")
+        if entry.file_type == "Folder":
+            entry.column_texts = (entry.name, entry.file_type, "", "", modified_time, "", "")
+        else:
+            bpm = f"{entry.bpm:.1f}" if entry.bpm else ""
+            if entry.duration == UNKNOWN_DURATION:
+                duration = "?"
+            else:
+                duration = self.format_time(entry.duration) if entry.duration else ""
+            entry.column_texts = (entry.name, entry.file_type, bpm, entry.key, modified_time, self.format_size(entry.size), duration)
+        return entry.column_texts
+
+    def get_folder_listing(self, folder_path):
+        '''Returns the sorted folders and audio files in a folder, reusing the cached listing if the folder hasn't changed since it was cached.'''
+
+        # Folders are modified when files inside of them are added, removed or renamed,
+        # so the cached listing is only valid while the modified time matches.
         try:
-            for item in os.listdir(current_path):
+            modified_time = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            return [], []
+
+        # Cached listings are stored as [modified time, folders and audio files in name order,
+        # sort order, folders and audio files in the sort order].
+        cached_listing = self.folder_cache.get(folder_path)
+        if cached_listing and cached_listing[0] == modified_time:
+            self.folder_cache.move_to_end(folder_path)
+        else:
+            folders, audio_files = list_folder(folder_path)
+            load_audio_durations(folder_path, audio_files, self.duration_cache, read_missing=False)
+            load_audio_analysis(folder_path, audio_files, self.analysis_cache)
+            cached_listing = [modified_time, folders, audio_files, None, None, None]
+
+            # Cache the listing, dropping the least recently used listings.
+            self.folder_cache[folder_path] = cached_listing
+            self.folder_cache.move_to_end(folder_path)
+            while len(self.folder_cache) > NAVIGATION_CACHE_SIZE:
+                self.folder_cache.popitem(last=False)
+
+        # Only sort the entries when the sort order has changed since they were last sorted.
+        modified_time, folders, audio_files, entry_sort_order, sorted_folders, sorted_audio_files = cached_listing
+        if entry_sort_order != self.sort_order:
+            if any(column == DURATION_COLUMN for column, descending in self.sort_order):
+                QApplication.setOverrideCursor(Qt.WaitCursor)
+                load_audio_durations(folder_path, audio_files, self.duration_cache)
+                QApplication.restoreOverrideCursor()
+            sorted_folders = sort_file_entries(folders, self.sort_order)
+            sorted_audio_files = sort_file_entries(audio_files, self.sort_order)
+            cached_listing[3:] = [list(self.sort_order), sorted_folders, sorted_audio_files]
+
+        return sorted_folders, sorted_audio_files
+
+    def invalidate_folder_listing(self, folder_path):
+        '''Removes the cached listing for a folder, so it's read again the next time it's loaded.'''
+        self.folder_cache.pop(folder_path, None)
+
+    def refresh_directory(self):
+        '''Reloads the current folder without using its cached listing.'''
+        self.invalidate_folder_listing(self.folder_path_field.text())
+        self.folder_statistics.folder_changed(self.folder_path_field.text())
+        self.load_files()
 
-                # Skip adding hidden folders.
-                if item.startswith('.'):
-                    continue
-                
-                # Add folders to the file browser.
-                item_path = os.path.join(current_path, item)
-                if os.path.isdir(item_path):
-                    folders.append((item, f"Folder"))
-                
-                # Add audio files to the file browser.
-                elif os.path.splitext(item)[1].lower() in SUPPORTED_AUDIO_EXTENSIONS:
-                    name, ext = os.path.splitext(item)
-                    audio_files.append((name, ext))
+    def request_folder_statistics(self):
+        '''Starts computing the totals of the displayed folder before any other folder.'''
+        if self.displayed_path:
+            self.folder_statistics.request(self.displayed_path)
 
-        except PermissionError:
-            pass
+    def update_folder_statistics_label(self):
+        '''Shows the totals of the displayed folder, when they've changed.'''
+        if not self.displayed_path:
+            self.displayed_statistics = None
+            self.folder_statistics_label.setText("")
+            return
+
+        # Only update the label when new statistics have been computed, or a different folder is shown.
+        statistics_key = (self.displayed_path, self.folder_statistics.version)
+        if statistics_key == self.displayed_statistics:
+            return
+        self.displayed_statistics = statistics_key
+
+        totals, partial = self.folder_statistics.get_totals(self.displayed_path)
+        minutes, seconds = divmod(int(totals.duration), 60)
+        hours, minutes = divmod(minutes, 60)
+        formats = sorted(((count, file_type) for file_type, count in totals.formats.items() if count > 0), reverse=True)
+        format_breakdown = ", ".join(f"{file_type.lstrip('.').upper()} {count}" for count, file_type in formats)
+
+        # Durations that can't be read aren't included in the total duration, so say how many are missing from it.
+        total_duration = f"{hours}:{minutes:02d}:{seconds:02d}"
+        if totals.unknown_duration_count > 0:
+            total_duration += f" (+{totals.unknown_duration_count} unknown)"
+
+        statistics = f"{totals.track_count} tracks  •  {total_duration}  •  {self.format_size(totals.size)}"
+        if format_breakdown:
+            statistics += f"  •  {format_breakdown}"
+        if partial:
+            statistics += "  (partial)"
+        self.folder_statistics_label.setText(statistics)
+
+    def save_view_state(self, folder_path):
+        '''Remembers the selected items and scroll position of the file browser for a folder.'''
+        selected_items = [(item.text(0), item.text(1)) for item in self.file_browser.selectedItems()]
+        scroll_position = self.file_browser.verticalScrollBar().value()
+        self.folder_view_states[folder_path] = (selected_items, scroll_position)
+        self.folder_view_states.move_to_end(folder_path)
+        while len(self.folder_view_states) > NAVIGATION_CACHE_SIZE:
+            self.folder_view_states.popitem(last=False)
+
+    def restore_view_state(self, folder_path):
+        '''Restores the selected items and scroll position of the file browser for a folder.'''
+        view_state = self.folder_view_states.get(folder_path)
+        if not view_state:
+            return
+
+        selected_items, scroll_position = view_state
+        if selected_items:
+            selected_items = set(selected_items)
+            for i in range(self.file_browser.topLevelItemCount()):
+                item = self.file_browser.topLevelItem(i)
+                if (item.text(0), item.text(1)) in selected_items:
+                    item.setSelected(True)
+
+        # The scroll range is only updated once the new items have been laid out.
+        QTimer.singleShot(0, lambda: self.restore_scroll_position(folder_path, scroll_position))
+
+    def restore_scroll_position(self, folder_path, scroll_position):
+        '''Scrolls the file browser to a position, if the folder is still being displayed.'''
+        if self.displayed_path == folder_path:
+            self.file_browser.verticalScrollBar().setValue(scroll_position)
+
+    def navigate_to(self, folder_path):
+        '''Opens a folder in the file browser, adding the current folder to the back history.'''
+        current_path = self.folder_path_field.text()
+        if folder_path == current_path:
+            return
 
-        for folder, folder_info in sorted(folders):
-            folder_item = QTreeWidgetItem([folder, folder_info])
-            folder_item.setIcon(0, QIcon.fromTheme("folder"))
-            self.file_browser.addTopLevelItem(folder_item)
+        if os.path.isdir(current_path):
+            self.back_history.append(current_path)
+        self.forward_history.clear()
 
-        for name, file_type in sorted(audio_files):
-            self.file_browser.addTopLevelItem(QTreeWidgetItem([name, file_type]))
+        # Changing the folder path field loads the folder.
+        self.folder_path_field.setText(folder_path)
+        self.update_navigation_buttons()
 
-        self.folder_path_field.setText(current_path)
+    def go_back(self):
+        '''Opens the previously visited folder.'''
+        if not self.back_history:
+            return
+        self.forward_history.append(self.folder_path_field.text())
+        self.folder_path_field.setText(self.back_history.pop())
+        self.update_navigation_buttons()
+
+    def go_forward(self):
+        '''Opens the folder that was visited before going back.'''
+        if not self.forward_history:
+            return
+        self.back_history.append(self.folder_path_field.text())
+        self.folder_path_field.setText(self.forward_history.pop())
+        self.update_navigation_buttons()
+
+    def update_navigation_buttons(self):
+        '''Enables the back and forward buttons only when there's a folder to go to.'''
+        self.back_button.setEnabled(bool(self.back_history))
+        self.forward_button.setEnabled(bool(self.forward_history))
 
     def file_item_double_clicked(self, item, column):
         '''Triggers when an item in the file browser is double clicked.'''
@@ -305,11 +1742,11 @@ class AudioPlayer(QWidget):
 
         new_path = os.path.join(current_path, item.text(0))
         if os.path.isdir(new_path):
-            self.folder_path_field.setText(new_path)
-            self.load_files()
+            self.navigate_to(new_path)
 
         # Play an audio file if it was double clicked.
         elif file_extension in SUPPORTED_AUDIO_EXTENSIONS:
+            self.stop_recursive_playback()
             audio_path = self.get_file_browser_item_path(item)
             self.play_audio(audio_path)
     
@@ -317,8 +1754,7 @@ class AudioPlayer(QWidget):
         current_path = self.folder_path_field.text()
         parent_path = os.path.dirname(current_path)
         if parent_path and parent_path != current_path:
-            self.folder_path_field.setText(parent_path)
-            self.load_files()
+            self.navigate_to(parent_path)
     
     def play_audio(self, audio_path):
         '''Updates the audio currently being played.'''
@@ -329,9 +1765,26 @@ class AudioPlayer(QWidget):
             self.log("Invalid path.")
             return
 
-        # Play the audio.
-        pygame.mixer.music.load(audio_path)
-        pygame.mixer.music.play(start=0)
+        # Stop the audio that was playing.
+        if self.playback:
+            self.playback.close()
+            self.playback = None
+
+        # Play uncompressed audio from a memory mapped file, so it isn't read into memory before playing.
+        if os.path.splitext(audio_path)[1].lower() in PCM_AUDIO_EXTENSIONS:
+            try:
+                self.playback = MappedPCMPlayback(audio_path)
+                self.playback.play(start=0)
+            except (OSError, ValueError, pygame.error) as e:
+                self.log(f"Unable to play from a memory mapped file, streaming instead: {e}")
+                if self.playback:
+                    self.playback.close()
+                    self.playback = None
+
+        # Play the audio, streaming it with the mixer's default format.
+        if self.playback is None:
+            self.playback = MixerMusicPlayback(audio_path, self.default_mixer_format)
+            self.playback.play(start=0)
 
         # Update the name of the audio file being played.
         audio_name = os.path.splitext(os.path.basename(audio_path))[0]
@@ -344,8 +1797,7 @@ class AudioPlayer(QWidget):
         self.seek_slider.setDisabled(False)
         
         # Update the label with the length of the audio file being played.
-        sound = pygame.mixer.Sound(audio_path)
-        audio_length = sound.get_length()
+        audio_length = self.playback.get_length()
         formatted_audio_length = self.format_time(audio_length)
         self.audio_length_label.setText(formatted_audio_length)
 
@@ -368,6 +1820,7 @@ class AudioPlayer(QWidget):
         '''Plays the first selected file.'''
         selected_items = self.file_browser.selectedItems()
         if selected_items:
+            self.stop_recursive_playback()
             audio_path = self.get_file_browser_item_path(selected_items[0])
             self.play_audio(audio_path)
 
@@ -394,18 +1847,91 @@ class AudioPlayer(QWidget):
         # If audio is playing, pause or unpause it.
         else:
             if self.paused:
-                pygame.mixer.music.unpause()
+                self.playback.unpause()
                 self.paused = False
                 self.play_button.setText("||")
 
             else:
-                pygame.mixer.music.pause()
+                self.playback.pause()
                 self.play_button.setText("▶")
                 self.paused = True
 
+    def play_folder_recursively(self):
+        '''Plays all audio files in the selected folder, or the current folder, and all of its subfolders.'''
+
+        # Play the first selected folder, or the current folder if no folders are selected.
+        root_path = self.folder_path_field.text()
+        for item in self.file_browser.selectedItems():
+            if item.text(1) == "Folder":
+                root_path = self.get_file_browser_item_path(item)
+                break
+
+        if not os.path.isdir(root_path):
+            return
+
+        # The queue is a generator, so it only walks as far into the folder as playback has reached.
+        self.log(f"Playing folder recursively: {root_path}")
+        self.recursive_root_path = root_path
+        self.recursive_queue = iter_audio_files_recursive(root_path, list(self.sort_order), self.duration_cache, self.analysis_cache)
+        self.recursive_history.clear()
+        self.recursive_upcoming.clear()
+        self.recursive_active_path = None
+        self.play_next_recursive_audio_file()
+
+    def stop_recursive_playback(self):
+        '''Stops playing through a folder recursively, returning to playing audio files in the current folder.'''
+        self.recursive_root_path = None
+        self.recursive_queue = None
+        self.recursive_history.clear()
+        self.recursive_upcoming.clear()
+        self.recursive_active_path = None
+
+    def play_next_recursive_audio_file(self):
+        '''Plays the next audio file while playing a folder recursively.'''
+
+        # Replay audio files that were skipped back over before taking new ones from the queue.
+        if self.recursive_upcoming:
+            audio_path = self.recursive_upcoming.popleft()
+        else:
+            audio_path = next(self.recursive_queue, None)
+
+            # If the end of the folder was reached, start again from the beginning.
+            if audio_path is None:
+                self.recursive_queue = iter_audio_files_recursive(self.recursive_root_path, list(self.sort_order), self.duration_cache, self.analysis_cache)
+                audio_path = next(self.recursive_queue, None)
+
+        # Stop playing recursively if the folder has no audio files left.
+        if audio_path is None:
+            self.log("No audio files found in the folder.")
+            self.stop_recursive_playback()
+            return
+
+        if self.recursive_active_path:
+            self.recursive_history.append(self.recursive_active_path)
+        self.recursive_active_path = audio_path
+        self.play_audio(audio_path)
+
+    def play_previous_recursive_audio_file(self):
+        '''Plays the previous audio file while playing a folder recursively.'''
+
+        # If there's no audio file to go back to, restart the active audio file.
+        if not self.recursive_history:
+            if self.recursive_active_path:
+                self.play_audio(self.recursive_active_path)
+            return
+
+        self.recursive_upcoming.appendleft(self.recursive_active_path)
+        self.recursive_active_path = self.recursive_history.pop()
+        self.play_audio(self.recursive_active_path)
+
     def play_next_audio_file(self):
         '''Plays the next audio file in the folder.'''
 
+        # Take the next audio file from the queue when playing a folder recursively.
+        if self.recursive_queue is not None:
+            self.play_next_recursive_audio_file()
+            return
+
         # Get the item index of the audio being played.
         active_index = self.get_active_audio_index()
         if active_index != -1:
@@ -432,6 +1958,11 @@ class AudioPlayer(QWidget):
     def play_previous_audio_file(self):
         '''Plays the previous audio file in the folder.'''
 
+        # Go back through the played audio files when playing a folder recursively.
+        if self.recursive_queue is not None:
+            self.play_previous_recursive_audio_file()
+            return
+
         # Get the item index of the audio being played.
         active_index = self.get_active_audio_index()
         if active_index != -1:
@@ -499,7 +2030,7 @@ class AudioPlayer(QWidget):
         # Attempt to rename the file or folder.
         try:
             os.rename(old_path, new_path)
-            self.load_files()
+            self.refresh_directory()
         except Exception as e:
             QMessageBox.critical(self, "Rename Error", f"Error renaming {old_name}: {e}")
 
@@ -548,6 +2079,13 @@ class AudioPlayer(QWidget):
         if destination_path == "":
             destination_path = current_path
 
+        # Folders can be modified more than once within their modified time resolution,
+        # so drop the cached listings of every folder the paste changes.
+        self.invalidate_folder_listing(destination_path)
+        if self.cut_mode:
+            for item_path in self.clipboard:
+                self.invalidate_folder_listing(os.path.dirname(item_path))
+
         # Paste all of the items in clipboard memory.
         for item_path in self.clipboard:
             item_name = os.path.basename(item_path)
@@ -577,14 +2115,314 @@ class AudioPlayer(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Paste Error", f"Error pasting {item_name}: {e}")
 
+        # Update the statistics of every folder the paste changed.
+        self.folder_statistics.folder_changed(destination_path)
+        if self.cut_mode:
+            for item_path in self.clipboard:
+                self.folder_statistics.folder_changed(os.path.dirname(item_path))
+
         # Clear the clipboard if the user cut files.
         if self.cut_mode:
             self.clipboard = []
             self.cut_mode = False
 
         # Update files in the current directory.
+        self.refresh_directory()
+
+    def export_files(self):
+        '''Transcodes all selected audio files, and audio files in selected folders, into another audio format.'''
+
+        # Transcoding is done with ffmpeg, so it must be installed.
+        if shutil.which("ffmpeg") is None:
+            QMessageBox.warning(self, "Export", "Exporting audio files requires ffmpeg to be installed.")
+            return
+
+        if self.export_futures:
+            QMessageBox.warning(self, "Export", "An export is already running.")
+            return
+
+        selected_items = self.file_browser.selectedItems()
+        if not selected_items:
+            return
+
+        # Prompt the user for the format, bitrate and folder to export to.
+        format_name, ok = QInputDialog.getItem(self, "Export As", "Format:", list(EXPORT_FORMATS), 0, False)
+        if not ok:
+            return
+
+        bitrate = ""
+        if format_name not in LOSSLESS_EXPORT_FORMATS:
+            default_index = EXPORT_BITRATES.index(DEFAULT_EXPORT_BITRATE)
+            bitrate, ok = QInputDialog.getItem(self, "Export As", "Bitrate:", EXPORT_BITRATES, default_index, False)
+            if not ok:
+                return
+
+        destination_path = QFileDialog.getExistingDirectory(self, "Export To", self.folder_path_field.text())
+        if not destination_path:
+            return
+
+        # Pair each audio file with its output path, keeping the folder structure of selected folders.
+        extension, codec, container = EXPORT_FORMATS[format_name]
+        export_jobs = []
+        used_output_paths = set()
+        for item in selected_items:
+            item_path = self.get_file_browser_item_path(item)
+            if os.path.isdir(item_path):
+                for foldername, subfolders, filenames in os.walk(item_path):
+                    subfolders[:] = sorted(subfolder for subfolder in subfolders if not subfolder.startswith('.'))
+                    relative_folder = os.path.relpath(foldername, os.path.dirname(item_path))
+                    for filename in sorted(filenames):
+                        name, ext = os.path.splitext(filename)
+                        if filename.startswith('.') or ext.lower() not in SUPPORTED_AUDIO_EXTENSIONS:
+                            continue
+                        if ext.lower() in UNSAMPLED_AUDIO_EXTENSIONS:
+                            continue
+                        output_path = self.get_unique_export_path(os.path.join(destination_path, relative_folder), name, ext, extension, used_output_paths)
+                        export_jobs.append((os.path.join(foldername, filename), output_path))
+
+            elif item.text(1).lower() not in UNSAMPLED_AUDIO_EXTENSIONS:
+                output_path = self.get_unique_export_path(destination_path, item.text(0), item.text(1), extension, used_output_paths)
+                export_jobs.append((item_path, output_path))
+
+        # Exporting to the folder a file is in, in the format it's already in, would write over the file while reading it.
+        skipped_paths = [source_path for source_path, output_path in export_jobs if is_same_file(source_path, output_path)]
+        if skipped_paths:
+            export_jobs = [(source_path, output_path) for source_path, output_path in export_jobs if not is_same_file(source_path, output_path)]
+            for skipped_path in skipped_paths:
+                self.log(f"Skipped exporting over the source file: {skipped_path}", error=True)
+            QMessageBox.warning(self, "Export", f"{len(skipped_paths)} audio files were skipped, because they would be exported over themselves:\n" + "\n".join(skipped_paths[:5]))
+
+        if not export_jobs:
+            QMessageBox.warning(self, "Export", "No audio files to export.")
+            return
+
+        # Outputs are only up to date if they were written with the same encoder and bitrate.
+        self.export_destination_path = destination_path
+        self.export_manifest = self.load_export_manifest(destination_path)
+        self.export_settings = [codec, bitrate]
+
+        # Transcode on a pool sized to the CPU count. Each job runs in its own ffmpeg process,
+        # so the pool threads only wait on those processes.
+        self.log(f"Exporting {len(export_jobs)} audio files to {destination_path} as {format_name}.")
+        self.export_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        self.export_processes = TranscodeProcesses()
+        self.export_output_paths = [output_path for source_path, output_path in export_jobs]
+        self.export_futures = [
+            self.export_executor.submit(
+                transcode_audio_file, source_path, output_path, codec, container, bitrate,
+                self.export_manifest.get(os.path.relpath(output_path, destination_path)), self.export_processes
+            )
+            for source_path, output_path in export_jobs
+        ]
+        self.export_start_time = time.monotonic()
+        self.export_timer.start(250)
+
+    def get_unique_export_path(self, folder_path, name, source_extension, extension, used_output_paths):
+        '''Returns the output path for an exported audio file. Audio files with the same name in different formats
+        would be exported to the same path, so the source format is added to the name of all but the first one.'''
+        output_path = os.path.join(folder_path, name + extension)
+        counter = 1
+        while os.path.normcase(output_path) in used_output_paths:
+            suffix = source_extension.lstrip('.').lower() if counter == 1 else f"{source_extension.lstrip('.').lower()}{counter}"
+            output_path = os.path.join(folder_path, f"{name}_{suffix}{extension}")
+            counter += 1
+        used_output_paths.add(os.path.normcase(output_path))
+        return output_path
+
+    def load_export_manifest(self, destination_path):
+        '''Loads the encoder and bitrate of files previously exported to a folder, stored as {relative path: [encoder, bitrate]}.'''
+        try:
+            with open(os.path.join(destination_path, EXPORT_MANIFEST_FILENAME), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_export_manifest(self):
+        '''Saves the encoder and bitrate of exported files into the folder they were exported to.'''
+        manifest_path = os.path.join(self.export_destination_path, EXPORT_MANIFEST_FILENAME)
+        try:
+            with open(manifest_path + ".tmp", 'w') as f:
+                json.dump(self.export_manifest, f)
+            os.replace(manifest_path + ".tmp", manifest_path)
+        except OSError as e:
+            self.log(f"Error saving the export manifest: {e}", error=True)
+
+    def check_export_progress(self):
+        '''Shows the progress of a running export, and reports the throughput once it has finished.'''
+        finished_count = sum(1 for future in self.export_futures if future.done())
+        if finished_count < len(self.export_futures):
+            self.setWindowTitle(f"RyMusic - Exporting {finished_count}/{len(self.export_futures)}")
+            return
+
+        self.export_timer.stop()
+        self.export_executor.shutdown()
+        self.setWindowTitle("RyMusic")
+        elapsed_time = max(time.monotonic() - self.export_start_time, 0.001)
+
+        # Total up the transcoded, skipped and failed files.
+        transcoded_count = 0
+        skipped_count = 0
+        transcoded_bytes = 0
+        errors = []
+        for output_path, future in zip(self.export_output_paths, self.export_futures):
+            relative_output_path = os.path.relpath(output_path, self.export_destination_path)
+            if future.exception():
+                errors.append(str(future.exception()))
+                self.export_manifest.pop(relative_output_path, None)
+                continue
+
+            if future.result() is None:
+                skipped_count += 1
+            else:
+                transcoded_count += 1
+                transcoded_bytes += future.result()
+            self.export_manifest[relative_output_path] = self.export_settings
+
+        self.save_export_manifest()
+        self.export_futures = []
+        self.export_output_paths = []
+        self.export_executor = None
+
+        # Report the overall throughput of the export.
+        transcoded_megabytes = transcoded_bytes / (1024 * 1024)
+        message = (
+            f"Exported {transcoded_count} audio files ({transcoded_megabytes:.1f} MB) in {elapsed_time:.1f}s, "
+            f"{transcoded_megabytes / elapsed_time:.1f} MB/s, {transcoded_count / elapsed_time:.1f} files/s.\n"
+            f"Skipped {skipped_count} up to date audio files."
+        )
+        self.log(message)
+        if errors:
+            for error in errors:
+                self.log(error, error=True)
+            message += f"\n{len(errors)} audio files failed to export:\n" + "\n".join(errors[:5])
+            QMessageBox.warning(self, "Export", message)
+        else:
+            QMessageBox.information(self, "Export", message)
+
+    def analyze_files(self):
+        '''Estimates the BPM and key of the selected audio files and audio files in selected folders, or of the whole current folder if nothing is selected.'''
+
+        # Audio is decoded with ffmpeg and analyzed with numpy, so both must be installed.
+        if shutil.which("ffmpeg") is None or np is None:
+            QMessageBox.warning(self, "Analyze", "Analyzing audio files requires ffmpeg and numpy to be installed.")
+            return
+
+        if self.analysis_executor:
+            QMessageBox.warning(self, "Analyze", "An analysis is already running.")
+            return
+
+        selected_paths = [self.get_file_browser_item_path(item) for item in self.file_browser.selectedItems()]
+        if not selected_paths:
+            selected_paths = [self.folder_path_field.text()]
+
+        # The analysis is CPU bound, so it runs on a pool of processes sized to the CPU count.
+        # Audio files are found and submitted by a background thread, and results are passed back through a queue
+        # and collected by a timer, so the interface never waits on either.
+        self.log("Analyzing audio files.")
+        worker_count = os.cpu_count() or 1
+        context = multiprocessing.get_context("spawn")
+        self.analysis_worker_ids = context.SimpleQueue()
+        self.analysis_executor = ProcessPoolExecutor(max_workers=worker_count, mp_context=context, initializer=register_analysis_worker, initargs=(self.analysis_worker_ids,))
+        self.analysis_collecting = True
+        self.analysis_total_count = 0
+        self.analysis_finished_count = 0
+        self.analysis_errors = []
+        threading.Thread(target=self.submit_analysis_jobs, args=(selected_paths, self.analysis_executor, worker_count * ANALYSIS_JOBS_PER_WORKER), daemon=True).start()
+        self.analysis_timer.start(250)
+
+    def submit_analysis_jobs(self, selected_paths, analysis_executor, max_waiting_jobs):
+        '''Walks through the selected paths on a background thread, submitting audio files that changed since they were last analyzed.
+        Only a few jobs per worker are submitted ahead of the workers, so analysis starts while folders are still being walked.'''
+        waiting_jobs = threading.Semaphore(max_waiting_jobs)
+
+        def job_finished(future, audio_path, modified_time):
+            waiting_jobs.release()
+            self.analysis_results.put((audio_path, modified_time, future))
+
+        try:
+            for audio_path in self.iter_analysis_paths(selected_paths):
+                if os.path.splitext(audio_path)[1].lower() in UNSAMPLED_AUDIO_EXTENSIONS:
+                    continue
+
+                # Skip audio files that haven't changed since they were last analyzed.
+                try:
+                    modified_time = os.path.getmtime(audio_path)
+                except OSError:
+                    continue
+                cached_analysis = self.analysis_cache.get(audio_path)
+                if cached_analysis and cached_analysis[0] == modified_time:
+                    continue
+
+                waiting_jobs.acquire()
+                future = analysis_executor.submit(analyze_audio_file, audio_path)
+                self.analysis_total_count += 1
+                future.add_done_callback(lambda future, audio_path=audio_path, modified_time=modified_time: job_finished(future, audio_path, modified_time))
+
+        # The executor is shut down if the app is closed during the analysis.
+        except RuntimeError:
+            pass
+        finally:
+            self.analysis_collecting = False
+
+    def iter_analysis_paths(self, selected_paths):
+        '''Yields the selected audio files, and the audio files in selected folders and their subfolders, skipping hidden files and folders.'''
+        for selected_path in selected_paths:
+            if not os.path.isdir(selected_path):
+                yield selected_path
+                continue
+
+            # Linked folders aren't followed, they can link back to a parent folder.
+            for foldername, subfolders, filenames in os.walk(selected_path):
+                subfolders[:] = [subfolder for subfolder in subfolders if not subfolder.startswith('.')]
+                for filename in filenames:
+                    if not filename.startswith('.') and os.path.splitext(filename)[1].lower() in SUPPORTED_AUDIO_EXTENSIONS:
+                        yield os.path.join(foldername, filename)
+
+    def check_analysis_progress(self):
+        '''Stores finished audio analysis results, and shows the results once the analysis has finished.'''
+        self.collect_analysis_results()
+        if self.analysis_collecting or self.analysis_finished_count < self.analysis_total_count:
+            self.setWindowTitle(f"RyMusic - Analyzing {self.analysis_finished_count}/{self.analysis_total_count}")
+            return
+
+        self.analysis_timer.stop()
+        self.analysis_executor.shutdown()
+        self.analysis_executor = None
+        self.setWindowTitle("RyMusic")
+        if self.analysis_total_count == 0:
+            QMessageBox.information(self, "Analyze", "All audio files have already been analyzed.")
+            return
+        self.save_analysis_cache()
+
+        # Apply the new results to cached folder listings, and re-sort them in case they're sorted by BPM or key.
+        for folder_path, cached_listing in self.folder_cache.items():
+            load_audio_analysis(folder_path, cached_listing[2], self.analysis_cache)
+            cached_listing[3] = None
         self.load_files()
 
+        self.log(f"Analyzed {self.analysis_total_count - len(self.analysis_errors)} audio files.")
+        if self.analysis_errors:
+            for error in self.analysis_errors:
+                self.log(error, error=True)
+            QMessageBox.warning(self, "Analyze", f"{len(self.analysis_errors)} audio files failed to be analyzed:\n" + "\n".join(self.analysis_errors[:5]))
+
+    def collect_analysis_results(self):
+        '''Stores the results of audio files analyzed since the results were last collected in the analysis cache.'''
+        while True:
+            try:
+                audio_path, modified_time, future = self.analysis_results.get_nowait()
+            except queue.Empty:
+                break
+
+            self.analysis_finished_count += 1
+            if future.cancelled():
+                continue
+            if future.exception():
+                self.analysis_errors.append(f"{audio_path}: {future.exception()}")
+                continue
+            bpm, key = future.result()
+            self.analysis_cache[audio_path] = [modified_time, bpm, key]
+
     def delete_files(self):
         '''Deletes all selected files and folders.'''
 
@@ -630,7 +2468,7 @@ class AudioPlayer(QWidget):
                     return
 
         # Update files in the current directory.
-        self.load_files()      
+        self.refresh_directory()
 
     def create_new_folder(self):
         '''Creates a new file folder in the current directory.'''
@@ -638,12 +2476,76 @@ class AudioPlayer(QWidget):
         folder_name, ok = QInputDialog.getText(self, "New Folder", "Enter folder name:")
         if ok and folder_name:
             os.mkdir(os.path.join(current_path, folder_name))
-            self.load_files()
+            self.refresh_directory()
 
     def sort_files(self):
         '''Sorts files in alphabetical order.'''
-        self.log("Sorted files.")
-        self.load_files()
+        self.sort_order = list(DEFAULT_SORT_ORDER)
+        self.apply_sort_order()
+
+    def file_browser_header_clicked(self, column):
+        '''Sorts the file browser by a clicked column. Shift clicking adds the column to the sort order instead of replacing it.'''
+        sort_columns = [sort_column for sort_column, descending in self.sort_order]
+
+        # Shift clicking a column that's already sorted by reverses its direction, otherwise the column is sorted by last.
+        if QApplication.keyboardModifiers() & Qt.ShiftModifier:
+            if column in sort_columns:
+                index = sort_columns.index(column)
+                self.sort_order[index] = (column, not self.sort_order[index][1])
+            else:
+                self.sort_order.append((column, False))
+
+        # Clicking the main sort column reverses its direction, clicking any other column sorts by only that column.
+        else:
+            primary_column, descending = self.sort_order[0]
+            if column == primary_column:
+                self.sort_order = [(column, not descending)]
+            else:
+                self.sort_order = [(column, False)]
+
+        self.apply_sort_order()
+
+    def apply_sort_order(self):
+        '''Shows the sort order in the file browser header and re-sorts the current folder.'''
+        primary_column, descending = self.sort_order[0]
+        self.file_browser.header().setSortIndicator(primary_column, Qt.DescendingOrder if descending else Qt.AscendingOrder)
+
+        sort_description = ", ".join(f"{FILE_BROWSER_COLUMNS[column]} {'descending' if descending else 'ascending'}" for column, descending in self.sort_order)
+        self.log(f"Sorted files by: {sort_description}")
+        self.resort_file_browser()
+
+    def resort_file_browser(self):
+        '''Puts the items in the file browser into the sort order, moving the existing items instead of creating new ones.'''
+        if not self.displayed_path:
+            return
+
+        # If the folder changed since it was shown, load it again instead.
+        folders, audio_files = self.get_folder_listing(self.displayed_path)
+        entries = folders + audio_files
+        items = [self.displayed_items.get((entry.name, entry.file_type)) for entry in entries]
+        if len(items) != self.file_browser.topLevelItemCount() or any(item is None for item in items):
+            self.load_files()
+            return
+
+        # Update the text of entries with values that were read for this sort, such as durations.
+        for entry, item in zip(entries, items):
+            if entry.column_texts is None:
+                for column, text in enumerate(self.get_column_texts(entry)):
+                    item.setText(column, text)
+
+        # Taking the items out clears their selection, so select them again afterwards.
+        current_item = self.file_browser.currentItem()
+        selected_items = self.file_browser.selectedItems()
+        scroll_position = self.file_browser.verticalScrollBar().value()
+        self.file_browser.setUpdatesEnabled(False)
+        self.file_browser.invisibleRootItem().takeChildren()
+        self.file_browser.addTopLevelItems(items)
+        if current_item:
+            self.file_browser.setCurrentItem(current_item, 0, QItemSelectionModel.NoUpdate)
+        for item in selected_items:
+            item.setSelected(True)
+        self.file_browser.setUpdatesEnabled(True)
+        self.file_browser.verticalScrollBar().setValue(scroll_position)
     
     def shuffle_audio_files(self):
         '''Shuffles the sorting for all audio files in the current directory.'''
@@ -668,17 +2570,24 @@ class AudioPlayer(QWidget):
     def timer_trigger(self):
         '''Triggers updates for user interface every few miliseconds.'''
 
+        # Do nothing until audio has been played.
+        if self.playback is None:
+            return
+
+        # Keep the mixer fed with audio.
+        self.playback.update()
+
         # Update the seek slider position, excluding when it's not playing music, or manually grabbed.
-        if pygame.mixer.music.get_busy() is True:
+        if self.playback.get_busy() is True:
             if self.slider_grabbed is False:
                 self.update_seek_slider_position()
 
         # If the song has ended, play the next song.
         else:
-            if self.paused == False and pygame.mixer.get_busy() == False:
+            if self.paused == False:
                 # If looping is enabled, restart the same song.
                 if self.loop_audio_action.isChecked():
-                    pygame.mixer.music.play(start=0)
+                    self.playback.play(start=0)
                     self.current_playtime_label.setText("0:00")
                     self.paused = False
                     self.last_seek_position = 0
@@ -691,9 +2600,9 @@ class AudioPlayer(QWidget):
     def update_seek_slider_position(self):
         '''Updates the current seek sliders position.'''
         if hasattr(self, 'last_seek_position') and self.last_seek_position is not None:
-            current_position = self.last_seek_position + (pygame.mixer.music.get_pos() / 1000)
+            current_position = self.last_seek_position + (self.playback.get_pos() / 1000)
         else:
-            current_position = pygame.mixer.music.get_pos() / 1000
+            current_position = self.playback.get_pos() / 1000
 
         self.seek_slider.setValue(int(current_position))
 
@@ -716,8 +2625,11 @@ class AudioPlayer(QWidget):
         seek_time = self.seek_slider.value()
         self.log(f"User seeked to: {seek_time}")
 
-        pygame.mixer.music.pause()
-        pygame.mixer.music.play(start=seek_time)
+        if self.playback is None:
+            return
+
+        self.playback.pause()
+        self.playback.play(start=seek_time)
 
         self.last_seek_position = seek_time
         self.update_seek_slider_position()
@@ -779,6 +2691,38 @@ class AudioPlayer(QWidget):
         seconds = int(seconds % 60)
         return f"{minutes}:{seconds:02d}"
 
+    def format_size(self, size):
+        '''Formats a file size in bytes into a readable size.'''
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+
+    def get_analysis_cache_path(self):
+        '''Returns the path of the file BPM and key analysis results are saved to.'''
+        data_path = QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation)
+        return os.path.join(data_path, "RyMusic", ANALYSIS_CACHE_FILENAME)
+
+    def load_analysis_cache(self):
+        '''Loads saved BPM and key analysis results, stored as {audio path: [modified time, bpm, key]}.'''
+        try:
+            with open(self.get_analysis_cache_path(), 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_analysis_cache(self):
+        '''Saves BPM and key analysis results, writing to a temporary file first so the saved results are never left half written.'''
+        cache_path = self.get_analysis_cache_path()
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path + ".tmp", 'w') as f:
+                json.dump(self.analysis_cache, f)
+            os.replace(cache_path + ".tmp", cache_path)
+        except OSError as e:
+            self.log(f"Error saving analysis results: {e}", error=True)
+
     def save_folder_path(self):
         '''Saves the folder path to settings.'''
         path = self.folder_path_field.text()
@@ -795,6 +2739,7 @@ class AudioPlayer(QWidget):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = AudioPlayer()
     window.show()
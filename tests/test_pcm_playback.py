@@ -0,0 +1,49 @@
+import os
+import struct
+import sys
+
+import pytest
+
+# Importing the app initializes the mixer, so use a dummy audio device.
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+pytest.importorskip("PyQt5")
+pytest.importorskip("pygame")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import main
+
+
+def write_aiff(path, samples, sample_rate=22050):
+    '''Writes mono 16 bit big endian samples to an AIFF file.'''
+    sample_data = struct.pack(f">{len(samples)}h", *samples)
+
+    # The sample rate is stored as an 80 bit float.
+    exponent = 16383 + 63
+    mantissa = sample_rate
+    while mantissa < 1 << 63:
+        mantissa <<= 1
+        exponent -= 1
+    comm_chunk = struct.pack(">hIhHQ", 1, len(samples), 16, exponent, mantissa)
+    ssnd_chunk = struct.pack(">II", 0, 0) + sample_data
+
+    chunks = b"COMM" + struct.pack(">I", len(comm_chunk)) + comm_chunk
+    chunks += b"SSND" + struct.pack(">I", len(ssnd_chunk)) + ssnd_chunk
+    with open(path, "wb") as aiff_file:
+        aiff_file.write(b"FORM" + struct.pack(">I", len(chunks) + 4) + b"AIFF" + chunks)
+
+
+def test_big_endian_aiff_buffer_is_byte_swapped(tmp_path, monkeypatch):
+    samples = [1, 2, -3, 32767, -32768]
+    aiff_path = str(tmp_path / "samples.aiff")
+    write_aiff(aiff_path, samples)
+
+    playback = main.MappedPCMPlayback(aiff_path)
+    try:
+        assert main.read_pcm_format(playback.mapped_file)[:3] == (22050, 1, True)
+
+        # Capture the buffer passed to the mixer instead of playing it.
+        monkeypatch.setattr(main.pygame.mixer, "Sound", lambda buffer: bytes(buffer))
+        buffer = playback.read_buffer()
+        assert buffer == struct.pack(f"={len(samples)}h", *samples)
+        assert playback.read_buffer() is None
+    finally:
+        playback.close()